@@ -0,0 +1,361 @@
+import gzip
+import hashlib
+import hmac
+import ipaddress
+import json
+import os
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from threading import Lock
+from typing import Any, Callable
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+from baby import Baby, Variable
+from data_loader import (
+    load_descriptor,
+    load_descriptor_index,
+    update_descriptor_index,
+)
+from login import HiddenUrlsError
+from meds import get_baby_intake_df
+
+CONNECTORS_FOLDER = Path("data_loaders")
+API_TOKEN = os.environ.get("API_TOKEN", os.environ.get("SECRET_PIN"))
+API_HOST = os.environ.get("API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("API_PORT", "8502"))
+CACHE_TTL = int(os.environ.get("API_CACHE_TTL", "300"))  # seconds
+MIN_GZIP_SIZE = 512  # bytes
+MAX_FAILED_ATTEMPTS = 5  # per client, within the lockout period
+LOCKOUT_SECONDS = 300
+CONTENT_TYPES = {"json": "application/json", "csv": "text/csv; charset=utf-8"}
+
+
+class ApiError(Exception):
+    def __init__(
+        self, status: int, message: str, headers: dict[str, str] | None = None
+    ):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+class TimedCache:
+    """
+    Thread-safe key/value cache whose entries expire after 'ttl' seconds.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self.entries: dict[str, tuple[float, Any]] = {}
+        self.key_locks: dict[str, Lock] = {}
+        self.lock = Lock()
+
+    def fresh_entry(self, key: str) -> tuple[float, Any] | None:
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            return entry
+        return None
+
+    def get(self, key: str, compute: Callable[[], Any]) -> Any:
+        entry = self.fresh_entry(key)
+        if entry is not None:
+            return entry[1]
+
+        # One computation per key at a time, so a burst of requests after the
+        # entry expires waits for a single fetch instead of starting its own
+        with self.lock:
+            key_lock = self.key_locks.setdefault(key, Lock())
+        with key_lock:
+            entry = self.fresh_entry(key)
+            if entry is not None:
+                return entry[1]
+            value = compute()
+            with self.lock:
+                self.entries[key] = (time.monotonic(), value)
+        return value
+
+    def invalidate(self, key: str) -> None:
+        with self.lock:
+            self.entries.pop(key, None)
+
+
+babies_cache = TimedCache(CACHE_TTL)
+responses_cache = TimedCache(CACHE_TTL)
+
+# Babies kept across cache expirations so they can be refreshed incrementally,
+# and the last response rendered for each path with the baby version it used
+babies: dict[str, Baby] = {}
+baby_locks: dict[str, Lock] = {}
+baby_locks_lock = Lock()
+rendered_responses: dict[str, tuple[int, tuple[str, str, bytes, bytes]]] = {}
+
+# Times of the recent failed authentications of each client
+failed_attempts: dict[str, list[float]] = {}
+failed_attempts_lock = Lock()
+
+
+def baby_lock(baby_id: str) -> Lock:
+    """
+    Lock serializing the refresh and the rendering of one baby, so responses
+    never see a baby half refreshed while other babies are served meanwhile.
+    """
+    with baby_locks_lock:
+        return baby_locks.setdefault(baby_id, Lock())
+
+
+def load_baby(baby_id: str) -> Baby:
+    index = load_descriptor_index(CONNECTORS_FOLDER)
+    entries = {Path(entry["file"]).stem: entry for entry in index}
+    if baby_id not in entries:
+        raise ApiError(404, f"Unknown baby '{baby_id}'")
+
+    descriptor = load_descriptor(CONNECTORS_FOLDER / entries[baby_id]["file"])
+    with baby_lock(baby_id):
+        try:
+            baby, changed = Baby.load_or_refresh(descriptor, babies.get(baby_id))
+        except HiddenUrlsError as e:
+            raise ApiError(503, str(e)) from e
+        babies[baby_id] = baby
+
+    if changed:
+        file_name = entries[baby_id]["file"]
+        update_descriptor_index(
+            CONNECTORS_FOLDER, index, file_name, baby.latest_sample_date()
+        )
+        responses_cache.invalidate("babies")
+    return baby
+
+
+def baby_variables(baby: Baby) -> list[Variable]:
+    return [baby.weight, baby.length, baby.cc]
+
+
+def get_metrics_df(baby: Baby) -> pd.DataFrame:
+    variables = baby_variables(baby)
+    return pd.DataFrame(
+        {
+            "Variable": [variable.name for variable in variables],
+            "Current": [variable.current for variable in variables],
+            "Units": [variable.units for variable in variables],
+            "Daily Increment": [variable.daily_increment for variable in variables],
+            "Weekly Increment": [variable.weekly_increment for variable in variables],
+            "Last Updated": [variable.last_updated for variable in variables],
+        }
+    )
+
+
+def get_history_df(baby: Baby) -> pd.DataFrame:
+    histories = [
+        variable.history[["Date", "Value"]].assign(Variable=variable.name)
+        for variable in baby_variables(baby)
+    ]
+    return pd.concat(histories)[["Variable", "Date", "Value"]]
+
+
+def dataframe_records(df: pd.DataFrame) -> list[dict]:
+    return json.loads(df.to_json(orient="records", date_format="iso"))
+
+
+def render_babies() -> Any:
+    return [
+        {
+            "id": Path(entry["file"]).stem,
+            "name": entry["name"],
+            "last_updated": entry["last_updated"],
+        }
+        for entry in load_descriptor_index(CONNECTORS_FOLDER)
+    ]
+
+
+def render_resource(baby: Baby, resource: str, fmt: str) -> Any:
+    """
+    Builds the payload of a baby resource: a dataframe for CSV responses or a
+    JSON-serializable object otherwise.
+    """
+    if resource == "intake":
+        df = get_baby_intake_df(baby)
+    elif resource == "history":
+        df = get_history_df(baby)
+    else:
+        df = get_metrics_df(baby)
+
+    if fmt == "csv":
+        return df
+    if resource == "metrics":
+        return {"name": baby.name, "age": baby.age, "metrics": dataframe_records(df)}
+    return dataframe_records(df)
+
+
+def build_response(path: str) -> tuple[str, str, bytes, bytes]:
+    """
+    Renders the response for a path as (content type, etag, body, gzipped body).
+
+    Supported paths are '/babies' and '/babies/<id>/<resource>.<format>', where
+    resource is one of 'metrics', 'intake' or 'history' and format is 'json'
+    or 'csv'. Baby responses are only rendered again when the baby changed.
+    """
+    parts = path.strip("/").split("/")
+    if parts == ["babies"]:
+        return responses_cache.get("babies", lambda: encode_response(render_babies()))
+    if len(parts) != 3 or parts[0] != "babies":
+        raise ApiError(404, f"Unknown path '{path}'")
+
+    resource, _, fmt = parts[2].partition(".")
+    if resource not in ["metrics", "intake", "history"] or fmt not in CONTENT_TYPES:
+        raise ApiError(404, f"Unknown resource '{parts[2]}'")
+
+    baby = babies_cache.get(parts[1], lambda: load_baby(parts[1]))
+    with baby_lock(parts[1]):
+        rendered = rendered_responses.get(path)
+        if rendered is not None and rendered[0] == baby.version:
+            return rendered[1]
+        response = encode_response(render_resource(baby, resource, fmt), fmt)
+        rendered_responses[path] = (baby.version, response)
+    return response
+
+
+def encode_response(payload: Any, fmt: str = "json") -> tuple[str, str, bytes, bytes]:
+    if fmt == "csv":
+        body = payload.to_csv(index=False).encode()
+    else:
+        body = json.dumps(payload).encode()
+
+    # Weak ETag, shared by the plain and the gzipped representations
+    etag = f'W/"{hashlib.sha1(body).hexdigest()}"'
+    return CONTENT_TYPES[fmt], etag, body, gzip.compress(body)
+
+
+def etag_matches(etag: str, if_none_match: str) -> bool:
+    """
+    Weak comparison of an If-None-Match header, ignoring the 'W/' prefixes,
+    so clients echoing the bare tag also get a 304.
+    """
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def record_failed_attempt(client: str, now: float) -> None:
+    """
+    Records a failed authentication, dropping the clients whose attempts are
+    all older than the lockout period so the record doesn't grow unbounded.
+    Must be called holding 'failed_attempts_lock'.
+    """
+    for other in list(failed_attempts):
+        if now - failed_attempts[other][-1] >= LOCKOUT_SECONDS:
+            del failed_attempts[other]
+    attempts = failed_attempts.setdefault(client, [])
+    attempts.append(now)
+    del attempts[:-MAX_FAILED_ATTEMPTS]
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        try:
+            self.check_token(parse_qs(url.query).get("token", [""])[0])
+            content_type, etag, body, gzipped = build_response(url.path)
+        except ApiError as e:
+            self.send_json_error(e.status, str(e), e.headers)
+            return
+        except Exception as e:
+            self.send_json_error(500, str(e))
+            return
+
+        if etag_matches(etag, self.headers.get("If-None-Match", "")):
+            self.send_response(304)
+            self.send_cache_headers(etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_cache_headers(etag)
+        if len(body) >= MIN_GZIP_SIZE and "gzip" in self.headers.get(
+            "Accept-Encoding", ""
+        ):
+            body = gzipped
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_cache_headers(self, etag: str) -> None:
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", f"private, max-age={CACHE_TTL}")
+        self.send_header("Vary", "Accept-Encoding")
+
+    def check_token(self, query_token: str) -> None:
+        """
+        Accepts the token either as a bearer token or as a 'token' query
+        parameter. Clients are locked out for LOCKOUT_SECONDS after
+        MAX_FAILED_ATTEMPTS failures, since the token may be a short pin.
+        """
+        client = self.client_id()
+        now = time.monotonic()
+        with failed_attempts_lock:
+            attempts = [
+                attempt
+                for attempt in failed_attempts.get(client, [])
+                if now - attempt < LOCKOUT_SECONDS
+            ]
+            if len(attempts) >= MAX_FAILED_ATTEMPTS:
+                retry_after = int(LOCKOUT_SECONDS - (now - attempts[0])) + 1
+                raise ApiError(
+                    429,
+                    "Too many failed attempts, try again later",
+                    {"Retry-After": str(retry_after)},
+                )
+
+        header = self.headers.get("Authorization", "")
+        token = header.removeprefix("Bearer ") if header else query_token
+        if not API_TOKEN or not hmac.compare_digest(token.encode(), API_TOKEN.encode()):
+            with failed_attempts_lock:
+                record_failed_attempt(client, now)
+            raise ApiError(401, "Invalid or missing token")
+
+    def client_id(self) -> str:
+        """
+        Address of the client. Behind a reverse proxy on the same host, every
+        request comes from loopback, so the address the proxy appended to
+        X-Forwarded-For is used instead.
+        """
+        peer = self.client_address[0]
+        forwarded_for = self.headers.get("X-Forwarded-For")
+        if forwarded_for and ipaddress.ip_address(peer).is_loopback:
+            return forwarded_for.split(",")[-1].strip()
+        return peer
+
+    def log_request(self, code: int | str = "-", size: int | str = "-") -> None:
+        # The query string may carry the token, so only the path is logged
+        if isinstance(code, HTTPStatus):
+            code = code.value
+        path = urlparse(self.path).path
+        self.log_message('"%s %s" %s %s', self.command, path, code, size)
+
+    def send_json_error(
+        self, status: int, message: str, headers: dict[str, str] | None = None
+    ) -> None:
+        body = json.dumps({"error": message}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", CONTENT_TYPES["json"])
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main() -> None:
+    if not API_TOKEN:
+        raise SystemExit("Set API_TOKEN or SECRET_PIN before serving the API.")
+    server = ThreadingHTTPServer((API_HOST, API_PORT), ApiHandler)
+    print(f"Serving dashbaby API on http://{API_HOST}:{API_PORT}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,94 @@
 from datetime import datetime
 from pathlib import Path
+from typing import Any, Callable
 
+import numpy as np
 import pandas as pd
 from data_loader import load_data, load_descriptor, load_meds
+from login import HiddenUrlsError, are_hidden_urls, reveal_urls
+
+DEFAULT_VELOCITY_WINDOW_DAYS = 7
+DEFAULT_VELOCITY_MIN_SAMPLES = 3
+DEFAULT_VELOCITY_MAX_GAP_DAYS = 10
+
+
+def row_fingerprints(dataframe: pd.DataFrame) -> np.ndarray:
+    """
+    Hashes every row of the dataframe, so two loads can be compared cheaply.
+    """
+    return pd.util.hash_pandas_object(dataframe, index=False).to_numpy()
 
 
 class Variable:
     def __init__(self, name: str, units: str, dataframe: pd.DataFrame):
         self.name = name
         self.units = units
+        self.fingerprints = row_fingerprints(dataframe)
         self.history = self.clean_history_samples(dataframe)
+        self.update_current_values()
 
+    def update_current_values(self):
         self.last_updated = self.history["Date"].iloc[-1]
         self.current = self.history["Value"].iloc[-1]
         self.compute_time_increments()
 
+    def refresh(self, dataframe: pd.DataFrame) -> bool:
+        """
+        Updates the variable from a freshly loaded dataframe. Rows appended
+        after the previously seen ones only extend the history, any other
+        change rebuilds it. Returns whether the history changed.
+
+        The new fingerprints are only kept once the update succeeds, so a
+        failed update is attempted again on the next refresh.
+        """
+        fingerprints = row_fingerprints(dataframe)
+        previous = self.fingerprints
+
+        if np.array_equal(fingerprints, previous):
+            return False
+
+        if len(fingerprints) > len(previous) and np.array_equal(
+            fingerprints[: len(previous)], previous
+        ):
+            history = self.extended_history(dataframe.iloc[len(previous) :])
+            if history is None:
+                self.fingerprints = fingerprints
+                return False
+        else:
+            history = self.clean_history_samples(dataframe)
+
+        state = self.__dict__.copy()
+        try:
+            self.history = history
+            self.update_current_values()
+        except Exception:
+            self.__dict__.update(state)
+            raise
+
+        self.fingerprints = fingerprints
+        return True
+
+    def extended_history(self, dataframe: pd.DataFrame) -> pd.DataFrame | None:
+        """
+        Returns the history with the new samples appended, keeping it sorted,
+        or None when there is no valid new sample.
+        """
+        samples = self.clean_history_samples(dataframe)
+        if samples.empty:
+            return None
+
+        history = pd.concat([self.history, samples])
+        if samples["Date"].iloc[0] < self.history["Date"].iloc[-1]:
+            history.sort_values("Date", inplace=True, kind="stable")
+        return history
+
     def clean_history_samples(self, dataframe: pd.DataFrame) -> pd.DataFrame:
         """
         Cleans the dataframe from NaN values and ensure samples are sorted.
         """
         history = dataframe.dropna().copy()
         history.rename(columns={self.name: "Value"}, inplace=True)
-        history.sort_values("Date", inplace=True)
+        history.sort_values("Date", inplace=True, kind="stable")
         return history
 
     def prior_sample_with_minimum_days_difference(
@@ -31,13 +98,12 @@ class Variable:
         Finds the first sample in the history with a time difference
         of at least 'min_days' from the given reference sample.
         """
-        old_sample = None
-        for index, row in self.history.iloc[::-1].iterrows():
-            days_difference = (reference_sample["Date"] - row["Date"]).days
-            if days_difference >= min_days:
-                old_sample = row
-                break
-        return old_sample
+        dates = self.history["Date"]
+        limit = reference_sample["Date"] - pd.Timedelta(days=min_days)
+        position = dates.searchsorted(limit, side="right") - 1
+        if position < 0:
+            return None
+        return self.history.iloc[position]
 
     def compute_time_increments(self):
         """
@@ -59,6 +125,63 @@ class Variable:
         self.daily_increment = round(value_difference / days_difference, 2)
         self.weekly_increment = round(self.daily_increment * 7, 2)
 
+    def compute_growth_velocity(
+        self,
+        window_days: int = DEFAULT_VELOCITY_WINDOW_DAYS,
+        min_samples: int = DEFAULT_VELOCITY_MIN_SAMPLES,
+        max_gap_days: int = DEFAULT_VELOCITY_MAX_GAP_DAYS,
+    ) -> pd.DataFrame:
+        """
+        Computes, for every sample, the least-squares slope of the values
+        measured within the previous 'window_days' (both ends included).
+
+        Works directly on the irregular raw samples: window sums are taken
+        from cumulative sums, so the whole history is processed in O(n).
+        A slope is flagged as confident when its window holds at least
+        'min_samples' samples and no two consecutive samples in it, nor its
+        first sample and the one before, are more than 'max_gap_days' apart.
+        """
+        dates = self.history["Date"]
+        values = self.history["Value"].to_numpy(dtype=float)
+        days = ((dates - dates.iloc[0]).dt.total_seconds() / 86400).to_numpy()
+
+        # Index of the oldest sample inside each window
+        start = np.searchsorted(days, days - window_days, side="left")
+        end = np.arange(len(days)) + 1
+
+        def window_sum(series: np.ndarray) -> np.ndarray:
+            cumulative = np.concatenate(([0.0], np.cumsum(series)))
+            return cumulative[end] - cumulative[start]
+
+        n = (end - start).astype(float)
+        sum_x, sum_y = window_sum(days), window_sum(values)
+        sum_xx, sum_xy = window_sum(days * days), window_sum(days * values)
+
+        denominator = n * sum_xx - sum_x * sum_x
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slope = np.where(
+                denominator > 0, (n * sum_xy - sum_x * sum_y) / denominator, np.nan
+            )
+
+        # Gaps are attributed to the later sample, so the gaps of samples
+        # start .. end - 1 include the pause right before the window begins
+        large_gaps = np.concatenate(([0], np.diff(days) > max_gap_days))
+        cumulative_gaps = np.concatenate(([0], np.cumsum(large_gaps)))
+        gaps_in_window = cumulative_gaps[end] - cumulative_gaps[start]
+
+        return pd.DataFrame(
+            {
+                "Date": dates.to_numpy(),
+                "Value": values,
+                "Daily Velocity": slope,
+                "Weekly Velocity": slope * 7,
+                "Samples": n.astype(int),
+                "Confident": (n >= min_samples)
+                & (gaps_in_window == 0)
+                & ~np.isnan(slope),
+            }
+        )
+
 
 class Baby:
     def __init__(self, name: str, data: pd.DataFrame, meds: pd.DataFrame):
@@ -71,7 +194,42 @@ class Baby:
         )
         self.meds = meds
         self.data = data
-        self.prematurity_days = 40 
+        self.prematurity_days = 40
+        self.version = 0
+        self.derived_values: dict[str, tuple[int, Any]] = {}
+
+    def derived(self, key: str, compute: Callable[[], Any]) -> Any:
+        """
+        Memoizes a value computed from the baby's data until its version
+        changes, so consumers skip rework for unchanged babies.
+        """
+        entry = self.derived_values.get(key)
+        if entry is None or entry[0] != self.version:
+            entry = (self.version, compute())
+            self.derived_values[key] = entry
+        return entry[1]
+
+    def refresh(self, data: pd.DataFrame, meds: pd.DataFrame) -> bool:
+        """
+        Updates the baby from freshly loaded spreadsheets, rebuilding only the
+        variables whose samples changed. 'version' is bumped whenever anything
+        changed, so downstream consumers can skip rework otherwise.
+        """
+        age = self.calculate_age(data)
+        changed = [
+            not data["Event"].equals(self.data["Event"]),
+            not meds.equals(self.meds),
+            age != self.age,
+        ]
+        try:
+            for variable in [self.weight, self.length, self.cc]:
+                changed.append(variable.refresh(data[["Date", variable.name]]))
+        finally:
+            # Variables refreshed before a failing one did change
+            if any(changed):
+                self.version += 1
+        self.age, self.data, self.meds = age, data, meds
+        return any(changed)
 
     def calculate_age(self, data: pd.DataFrame) -> int:
         oldest_date = data["Date"].min().date()
@@ -83,12 +241,43 @@ class Baby:
         conn = load_descriptor(descriptor_file)
         return cls.from_dict(conn)
 
-    @classmethod
-    def from_dict(cls, descriptor: dict):
+    @staticmethod
+    def load_spreadsheets(descriptor: dict) -> tuple[pd.DataFrame, pd.DataFrame]:
         data_ss, meds_ss = (
             descriptor["data_spreadsheet"],
             descriptor["meds_spreadsheet"],
         )
         data_df = load_data(data_ss["url"], data_ss["sheet"], data_ss["fields"])
         meds_df = load_meds(meds_ss["url"], meds_ss["sheet"], meds_ss["fields"])
+        return data_df, meds_df
+
+    @classmethod
+    def load_or_refresh(
+        cls, descriptor: dict, previous: "Baby | None" = None
+    ) -> tuple["Baby", bool]:
+        """
+        Reveals the descriptor URLs and fetches its spreadsheets. 'previous'
+        is refreshed when it is the same baby, otherwise a new one is built.
+        Returns the baby and whether it changed.
+        """
+        descriptor = reveal_urls(descriptor)
+        if are_hidden_urls([descriptor]):
+            raise HiddenUrlsError(f"Hidden URLs remain in {descriptor['name']}")
+        data_df, meds_df = cls.load_spreadsheets(descriptor)
+
+        if previous is not None and previous.name == descriptor["name"]:
+            return previous, previous.refresh(data_df, meds_df)
+
+        baby = cls(name=descriptor["name"], data=data_df, meds=meds_df)
+        # Keep versions increasing so anything derived from 'previous' is dropped
+        if previous is not None:
+            baby.version = previous.version + 1
+        return baby, True
+
+    def latest_sample_date(self) -> str:
+        return str(self.data["Date"].max().date())
+
+    @classmethod
+    def from_dict(cls, descriptor: dict):
+        data_df, meds_df = cls.load_spreadsheets(descriptor)
         return cls(name=descriptor["name"], data=data_df, meds=meds_df)
@@ -1,10 +1,15 @@
+import math
 import os
 from pathlib import Path
 
 import streamlit as st
 from baby import Baby
-from data_loader import load_descriptor
-from login import are_hidden_urls, reveal_urls
+from data_loader import (
+    load_descriptor,
+    load_descriptor_index,
+    update_descriptor_index,
+)
+from login import HiddenUrlsError
 from plots import (
     plot_average_daily_increment,
     plot_cc,
@@ -23,6 +28,7 @@ COLOR_PALETTE = [
 CONNECTORS_FOLDER = Path("data_loaders")
 BANNER_IMAGE = ".streamlit/banner.png"
 SECRET_PIN = os.environ.get("SECRET_PIN")
+PAGE_SIZE = 4
 
 
 def display_data_error() -> None:
@@ -47,14 +53,69 @@ def display_login() -> None:
                 st.error(AUTH_ERROR_MSG)
 
 
+def search_descriptor_index(index: list[dict], query: str) -> list[dict]:
+    """
+    Filters the index entries whose name or sheet contain the query.
+    """
+    query = query.strip().lower()
+    if not query:
+        return index
+    return [
+        entry
+        for entry in index
+        if query in entry["name"].lower() or query in entry["sheet"].lower()
+    ]
+
+
+def paginate(entries: list[dict], page: int, page_size: int = PAGE_SIZE) -> list[dict]:
+    start = (page - 1) * page_size
+    return entries[start : start + page_size]
+
+
+def load_baby(entry: dict, index: list[dict], loaded: dict[str, Baby]) -> Baby:
+    """
+    Fetches the baby of an index entry, at most once per run. Babies shown in
+    the previous run of the session are refreshed instead of rebuilt.
+    """
+    if entry["file"] not in loaded:
+        descriptor = load_descriptor(CONNECTORS_FOLDER / entry["file"])
+        previous = st.session_state.babies.get(entry["file"])
+        try:
+            baby, changed = Baby.load_or_refresh(descriptor, previous)
+        except HiddenUrlsError:
+            display_data_error()
+
+        if changed:
+            update_descriptor_index(
+                CONNECTORS_FOLDER, index, entry["file"], baby.latest_sample_date()
+            )
+        loaded[entry["file"]] = baby
+    return loaded[entry["file"]]
+
+
 # Function to display the main dashboard
-def display_dashboard(babies: list[Baby]):
+def display_dashboard(index: list[dict]):
+    loaded: dict[str, Baby] = {}
+
+    col1, sep12, col2 = st.columns([3, 0.1, 1])
+    with col1:
+        query = st.text_input("Search", placeholder="Baby name or sheet")
+    matches = search_descriptor_index(index, query)
+    with col2:
+        page_count = max(1, math.ceil(len(matches) / PAGE_SIZE))
+        page = st.number_input("Page", min_value=1, max_value=page_count, step=1)
+    page_entries = paginate(matches, int(page))
+
     tab1, tab2, tab3 = st.tabs(["Today", "History", "Monthly Report"])
 
     with tab1:
         st.image(BANNER_IMAGE, use_column_width=True)
         st.write("")
         st.header("Today")
+        st.caption(f"Page {page} of {page_count} ({len(matches)} babies)")
+        if not page_entries:
+            st.info("No babies match your search.")
+        babies = [load_baby(entry, index, loaded) for entry in page_entries]
 
         # Create three columns with padding
         col1, sep12, col2 = st.columns([1, 0.1, 1])
@@ -73,14 +134,24 @@ def display_dashboard(babies: list[Baby]):
         st.write("")
         st.header("History")
 
+        # Only the selected babies are fetched, defaulting to the current page
+        entries = {entry["file"]: entry for entry in matches}
+        selected = st.multiselect(
+            "Babies",
+            options=list(entries),
+            default=[entry["file"] for entry in page_entries],
+            format_func=lambda file: entries[file]["name"],
+        )
+        history_babies = [load_baby(entries[file], index, loaded) for file in selected]
+
         # Create three columns with padding
         col1, sep12, col2, sep23, col3 = st.columns([1, 0.1, 1, 0.1, 1])
 
         with col1:
             # Plot weights for selected baby
             st.subheader("Weight")
-            plot_weights(babies, COLOR_PALETTE)
-            plot_weights(babies, COLOR_PALETTE, corrected=True)
+            plot_weights(history_babies, COLOR_PALETTE)
+            plot_weights(history_babies, COLOR_PALETTE, corrected=True)
 
         with sep12:
             st.write("")
@@ -88,8 +159,8 @@ def display_dashboard(babies: list[Baby]):
         with col2:
             # Plot weights for selected baby
             st.subheader("Length")
-            plot_lengths(babies, COLOR_PALETTE)
-            plot_lengths(babies, COLOR_PALETTE, corrected=True)
+            plot_lengths(history_babies, COLOR_PALETTE)
+            plot_lengths(history_babies, COLOR_PALETTE, corrected=True)
 
         with sep23:
             st.write("")
@@ -97,8 +168,8 @@ def display_dashboard(babies: list[Baby]):
         with col3:
             # Plot weights for selected baby
             st.subheader("Cephalic Circumference")
-            plot_cc(babies, COLOR_PALETTE)
-            plot_cc(babies, COLOR_PALETTE, corrected=True)
+            plot_cc(history_babies, COLOR_PALETTE)
+            plot_cc(history_babies, COLOR_PALETTE, corrected=True)
 
     with tab3:
         st.image(BANNER_IMAGE, use_column_width=True)
@@ -129,24 +200,22 @@ def display_dashboard(babies: list[Baby]):
                         baby, lambda baby: baby.length, bar_color=color
                     )
 
+    # Only the babies on the page or selected in History stay in the session
+    st.session_state.babies = loaded
 
-# Main logic
-babies_descriptors = []
-for file in CONNECTORS_FOLDER.glob("*.json"):
-    descriptor = load_descriptor(file)
-    descriptor = reveal_urls(descriptor)
-    babies_descriptors.append(descriptor)
 
+# Main logic
 st.set_page_config(layout="wide")
 
-if are_hidden_urls(babies_descriptors):
-    display_data_error()
+descriptor_index = load_descriptor_index(CONNECTORS_FOLDER)
 
 if "logged_in" not in st.session_state:
     st.session_state["logged_in"] = False
 
+if "babies" not in st.session_state:
+    st.session_state["babies"] = {}
+
 if st.session_state.logged_in:
-    babies = [Baby.from_dict(descriptor) for descriptor in babies_descriptors]
-    display_dashboard(babies)
+    display_dashboard(descriptor_index)
 else:
     display_login()
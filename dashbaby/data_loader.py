@@ -1,10 +1,16 @@
+import fcntl
 import json
+import tempfile
+from collections.abc import Iterator
+from contextlib import contextmanager
 from pathlib import Path
 
 import pandas as pd
 
 DATA_COLUMNS = ["Date", "Weight", "Length", "Cephalic Circumference", "Event"]
 MEDS_COLUMNS = ["Med", "Concentration", "Unit"]
+DESCRIPTOR_INDEX_FILE = ".descriptor_index.json"
+DESCRIPTOR_INDEX_LOCK_FILE = ".descriptor_index.lock"
 
 
 def dataframe_has_all_columns(dataframe: pd.DataFrame, elements: list[str]) -> bool:
@@ -19,6 +25,123 @@ def load_descriptor(descriptor_file: Path) -> dict:
         return json.load(file)
 
 
+def descriptor_index_entry(descriptor_file: Path) -> dict:
+    """
+    Summarizes a descriptor file with the fields needed to list and search it
+    without loading its spreadsheets.
+    """
+    descriptor = load_descriptor(descriptor_file)
+    return {
+        "file": descriptor_file.name,
+        "name": descriptor["name"],
+        "sheet": descriptor["data_spreadsheet"]["sheet"],
+        "modified": descriptor_file.stat().st_mtime,
+        "last_updated": None,
+    }
+
+
+def save_descriptor_index(folder: Path, index: list[dict]) -> None:
+    """
+    Writes the index to a temporary file and moves it into place, so other
+    sessions and the API never read a half-written index.
+    """
+    with tempfile.NamedTemporaryFile(
+        "w", dir=folder, prefix=DESCRIPTOR_INDEX_FILE, suffix=".tmp", delete=False
+    ) as file:
+        json.dump({"descriptors": index}, file, indent=4)
+    Path(file.name).replace(folder / DESCRIPTOR_INDEX_FILE)
+
+
+@contextmanager
+def descriptor_index_lock(folder: Path) -> Iterator[None]:
+    """
+    Serializes read-modify-write cycles of the index across sessions and
+    processes, so concurrent writers don't drop each other's updates.
+    """
+    with Path.open(folder / DESCRIPTOR_INDEX_LOCK_FILE, "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def load_cached_descriptor_index(index_file: Path) -> dict[str, dict]:
+    """
+    Reads the index entries by descriptor file, or none when the index is
+    missing or corrupt, so it gets rebuilt from the descriptors.
+    """
+    try:
+        return {
+            entry["file"]: entry for entry in load_descriptor(index_file)["descriptors"]
+        }
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
+
+
+def scan_descriptor_index(folder: Path) -> tuple[list[dict], bool]:
+    """
+    Reads the on-disk index and parses again the descriptors added or
+    modified since it was written. Returns the index and whether it differs
+    from the one on disk.
+    """
+    cached = load_cached_descriptor_index(folder / DESCRIPTOR_INDEX_FILE)
+
+    index, changed = [], False
+    for descriptor_file in sorted(folder.glob("*.json")):
+        if descriptor_file.name == DESCRIPTOR_INDEX_FILE:
+            continue
+        entry = cached.pop(descriptor_file.name, None)
+        if entry is None or entry.get("modified") != descriptor_file.stat().st_mtime:
+            previous = entry
+            entry = descriptor_index_entry(descriptor_file)
+            # The spreadsheets didn't change along with the descriptor
+            if previous is not None:
+                entry["last_updated"] = previous.get("last_updated")
+            changed = True
+        index.append(entry)
+
+    # Entries left in the cache belong to descriptors that no longer exist
+    return index, changed or bool(cached)
+
+
+def load_descriptor_index(folder: Path) -> list[dict]:
+    """
+    Loads the on-disk index of the descriptors in 'folder'. Only descriptors
+    added or modified since the index was last written are parsed again.
+    """
+    index, changed = scan_descriptor_index(folder)
+    if changed:
+        # Scanned again under the lock to build on the latest written index
+        with descriptor_index_lock(folder):
+            index, changed = scan_descriptor_index(folder)
+            if changed:
+                save_descriptor_index(folder, index)
+    return index
+
+
+def update_descriptor_index(
+    folder: Path, index: list[dict], file_name: str, last_updated: str
+) -> None:
+    """
+    Records the date of the latest sample of a descriptor in 'index' and on
+    disk. Only that entry of the latest written index is changed, so updates
+    other sessions made in the meantime are kept.
+    """
+    for entry in index:
+        if entry["file"] == file_name:
+            entry["last_updated"] = last_updated
+
+    with descriptor_index_lock(folder):
+        latest, changed = scan_descriptor_index(folder)
+        for entry in latest:
+            if entry["file"] == file_name and entry["last_updated"] != last_updated:
+                entry["last_updated"] = last_updated
+                changed = True
+        if changed:
+            save_descriptor_index(folder, latest)
+
+
 def load_spreadsheet(
     url: str, sheet_name: str, field_aliases: dict[str, str]
 ) -> pd.DataFrame:
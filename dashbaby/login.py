@@ -3,6 +3,13 @@ import os
 import requests
 
 
+class HiddenUrlsError(Exception):
+    """
+    Raised when a descriptor keeps hidden URLs because their env vars are
+    missing or don't point to a reachable spreadsheet.
+    """
+
+
 def check_url(url: str | None) -> bool:
     # Make an HTTP request to the decrypted URL
     if url is None:
@@ -37,7 +37,7 @@ def plot_metrics(baby: Baby):
 
 
 def plot_intake_report(baby: Baby):
-    st.table(get_baby_intake_df(baby))
+    st.table(baby.derived("intake", lambda: get_baby_intake_df(baby)))
 
 
 def plot_summary(baby: Baby):
@@ -47,6 +47,22 @@ def plot_summary(baby: Baby):
     plot_intake_report(baby)
 
 
+def compute_trend_samples(
+    baby: Baby, variable: Variable, corrected: bool = False
+) -> pd.DataFrame:
+    df = variable.history.rename(columns={"Value": baby.name})
+
+    # Convert 'Date' to elapsed days
+    df["Date"] = (df["Date"] - df["Date"].min()).dt.days
+
+    # Adjust for prematurity if corrected is True
+    if corrected:
+        df["Date"] = df["Date"] - baby.prematurity_days
+        # Filter out rows where Date is less than or equal to 0
+        df = df[df["Date"] > 0]
+    return df
+
+
 def plot_trend(
     babies: list,  # Assuming babies is a list of Baby objects or similar
     variable_selector: Callable[
@@ -65,16 +81,10 @@ def plot_trend(
     # Process each baby's data
     for baby in babies:
         variable = variable_selector(baby)
-        df = variable.history.rename(columns={"Value": baby.name})
-
-        # Convert 'Date' to elapsed days
-        df["Date"] = (df["Date"] - df["Date"].min()).dt.days
-
-        # Adjust for prematurity if corrected is True
-        if corrected:
-            df["Date"] = df["Date"] - baby.prematurity_days
-            # Filter out rows where Date is less than or equal to 0
-            df = df[df["Date"] > 0]
+        df = baby.derived(
+            f"trend {variable.name} {corrected}",
+            lambda: compute_trend_samples(baby, variable, corrected),
+        )
 
         # Merge dataframes
         merged_df = (
@@ -178,6 +188,31 @@ def plot_trend(
     st.altair_chart(combined_chart, use_container_width=True)
 
 
+def compute_weekly_increments(variable: Variable) -> pd.DataFrame:
+    # Rolling regression slopes over the raw samples, one per measurement
+    velocity_df = variable.compute_growth_velocity()
+    velocity_df["Date"] = pd.to_datetime(velocity_df["Date"])
+
+    # Calculate weekly averages of the samples with a slope. A week is confident
+    # when most of its slopes are, the first ones of a history never being so
+    estimated_df = velocity_df.dropna(subset=["Daily Velocity"])
+    weekly_df = (
+        estimated_df.resample("W", on="Date")
+        .agg({"Daily Velocity": "mean", "Confident": "mean"})
+        .dropna()
+        .reset_index()
+    )
+    weekly_df["Confident"] = weekly_df["Confident"] >= 0.5
+    weekly_df.rename(
+        columns={"Daily Velocity": "Average Daily Increment"}, inplace=True
+    )
+
+    # Add a column for adjusted week number
+    base_week = velocity_df["Date"].iloc[0].isocalendar().week
+    weekly_df["Week Number"] = weekly_df["Date"].dt.isocalendar().week - base_week + 1
+    return weekly_df
+
+
 def plot_average_daily_increment(
     baby: Baby,
     variable_selector: Callable[[Baby], Variable],
@@ -189,39 +224,17 @@ def plot_average_daily_increment(
         return
 
     var_name, units = variable.name, variable.units
-    df = variable.history.copy()
-
-    if "Date" not in df.columns or "Value" not in df.columns:
+    columns = variable.history.columns
+    if "Date" not in columns or "Value" not in columns:
         st.write("Missing required data columns.")
         return
 
-    # Ensure 'Date' column is datetime type
-    df["Date"] = pd.to_datetime(df["Date"])
-
-    # Resample data to daily frequency and interpolate missing values
-    df.set_index("Date", inplace=True)
-    df_daily = df.resample(
-        "D"
-    ).first()  # Use 'first' to avoid introducing NaNs where not necessary
-    df_daily["Value"] = df_daily[
-        "Value"
-    ].interpolate()  # Interpolate to fill missing values
-
-    # Calculate daily increments
-    df_daily["Daily Increment"] = df_daily["Value"].diff()
-
-    # Reset index to remove 'Date' as the index if necessary for further processing
-    df_daily.reset_index(inplace=True)
-
-    # Calculate weekly averages
-    weekly_df = df_daily.resample("W", on="Date").mean().reset_index()
-    weekly_df.rename(
-        columns={"Daily Increment": "Average Daily Increment"}, inplace=True
+    weekly_df = baby.derived(
+        f"weekly {var_name}", lambda: compute_weekly_increments(variable)
     )
-
-    # Add a column for adjusted week number
-    base_week = weekly_df["Date"].iloc[0].isocalendar().week
-    weekly_df["Week Number"] = weekly_df["Date"].dt.isocalendar().week - base_week + 1
+    if weekly_df.empty:
+        st.write("Not enough samples to estimate growth velocity.")
+        return
 
     # Create the bar chart using Altair
     chart = (
@@ -234,7 +247,8 @@ def plot_average_daily_increment(
             y=alt.Y(
                 "Average Daily Increment:Q", title=f"Average Daily Increment [{units}]"
             ),
-            tooltip=["Week Number:O", "Average Daily Increment:Q"],
+            opacity=alt.condition(alt.datum.Confident, alt.value(1.0), alt.value(0.4)),
+            tooltip=["Week Number:O", "Average Daily Increment:Q", "Confident:N"],
         )
         .properties(
             width=700,
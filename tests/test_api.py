@@ -0,0 +1,269 @@
+import gzip
+import http.client
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+import api
+import pandas as pd
+import pytest
+from api import TimedCache
+from baby import Baby
+
+TOKEN = "sekret"
+AUTH = {"Authorization": f"Bearer {TOKEN}"}
+
+
+def write_descriptor(path, name: str, is_hidden: bool = False) -> None:
+    spreadsheet = {"url": "SHEET_URL", "is_hidden": is_hidden, "sheet": name}
+    descriptor = {
+        "name": name,
+        "data_spreadsheet": spreadsheet,
+        "meds_spreadsheet": spreadsheet,
+    }
+    path.write_text(json.dumps(descriptor))
+
+
+def make_data(days: int) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Date": pd.date_range("2024-01-01", periods=days),
+            "Weight": [2000.0 + 30 * day for day in range(days)],
+            "Length": [45.0 + 0.1 * day for day in range(days)],
+            "Cephalic Circumference": [32.0] * days,
+            "Event": [None] * days,
+        }
+    )
+
+
+@pytest.fixture
+def sheets(monkeypatch):
+    """
+    Spreadsheets served to every baby instead of fetching them.
+    """
+    loaded = {
+        "data": make_data(30),
+        "meds": pd.DataFrame(
+            {
+                "Med": ["Vitamina D", "Hierro"],
+                "Concentration": [200, 25],
+                "Unit": ["ui", "mg"],
+            }
+        ),
+        "fetches": 0,
+    }
+
+    def load_spreadsheets(descriptor: dict) -> tuple[pd.DataFrame, pd.DataFrame]:
+        loaded["fetches"] += 1
+        return loaded["data"], loaded["meds"]
+
+    monkeypatch.setattr(Baby, "load_spreadsheets", staticmethod(load_spreadsheets))
+    return loaded
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch, sheets):
+    write_descriptor(tmp_path / "laura.json", "Laura")
+    write_descriptor(tmp_path / "sara.json", "Sara")
+    write_descriptor(tmp_path / "hidden.json", "Hidden", is_hidden=True)
+
+    monkeypatch.setattr(api, "CONNECTORS_FOLDER", tmp_path)
+    monkeypatch.setattr(api, "API_TOKEN", TOKEN)
+    monkeypatch.setattr(api, "babies_cache", TimedCache(60))
+    monkeypatch.setattr(api, "responses_cache", TimedCache(60))
+    monkeypatch.setattr(api, "babies", {})
+    monkeypatch.setattr(api, "rendered_responses", {})
+    monkeypatch.setattr(api, "failed_attempts", {})
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), api.ApiHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd.server_address[1]
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def get(port: int, path: str, headers: dict[str, str] | None = None):
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    connection.request("GET", path, headers=headers or {})
+    response = connection.getresponse()
+    body = response.read()
+    connection.close()
+    return response, body
+
+
+def test_bearer_and_query_tokens_are_accepted(server):
+    response, body = get(server, "/babies", AUTH)
+    assert response.status == 200
+    assert [baby["id"] for baby in json.loads(body)] == ["hidden", "laura", "sara"]
+
+    response, _ = get(server, f"/babies?token={TOKEN}")
+    assert response.status == 200
+
+
+def test_missing_or_wrong_token_is_rejected(server):
+    assert get(server, "/babies")[0].status == 401
+    response, body = get(server, "/babies", {"Authorization": "Bearer bad"})
+    assert response.status == 401
+    assert json.loads(body) == {"error": "Invalid or missing token"}
+
+
+def test_repeated_failures_lock_out_only_that_client(server):
+    bad = {"Authorization": "Bearer bad", "X-Forwarded-For": "10.0.0.1"}
+    for _ in range(api.MAX_FAILED_ATTEMPTS):
+        assert get(server, "/babies", bad)[0].status == 401
+
+    response, _ = get(server, "/babies", {**AUTH, "X-Forwarded-For": "10.0.0.1"})
+    assert response.status == 429
+    assert 0 < int(response.getheader("Retry-After")) <= api.LOCKOUT_SECONDS
+
+    response, _ = get(server, "/babies", {**AUTH, "X-Forwarded-For": "10.0.0.2"})
+    assert response.status == 200
+
+
+def test_stale_failed_attempts_are_pruned(monkeypatch):
+    monkeypatch.setattr(api, "failed_attempts", {"10.0.0.1": [0.0]})
+    api.record_failed_attempt("10.0.0.2", api.LOCKOUT_SECONDS + 1.0)
+    assert list(api.failed_attempts) == ["10.0.0.2"]
+
+
+def test_query_token_is_not_logged(server, capsys):
+    get(server, f"/babies?token={TOKEN}")
+    time.sleep(0.1)
+    err = capsys.readouterr().err
+    assert '"GET /babies" 200' in err
+    assert TOKEN not in err
+
+
+@pytest.mark.parametrize(
+    "path, status",
+    [
+        ("/", 404),
+        ("/babies/laura", 404),
+        ("/babies/nobody/metrics.json", 404),
+        ("/babies/laura/weight.json", 404),
+        ("/babies/laura/metrics.xml", 404),
+        ("/babies/hidden/metrics.json", 503),
+    ],
+)
+def test_unknown_paths(server, path, status):
+    assert get(server, path, AUTH)[0].status == status
+
+
+def test_metrics_json(server):
+    response, body = get(server, "/babies/laura/metrics.json", AUTH)
+
+    assert response.status == 200
+    assert response.getheader("Content-Type") == "application/json"
+    metrics = json.loads(body)
+    assert metrics["name"] == "Laura"
+    weight = metrics["metrics"][0]
+    assert weight["Variable"] == "Weight"
+    assert weight["Current"] == 2870.0
+    assert weight["Daily Increment"] == 30.0
+    assert weight["Weekly Increment"] == 210.0
+
+
+def test_csv_resources(server):
+    response, body = get(server, "/babies/laura/history.csv", AUTH)
+    assert response.getheader("Content-Type").startswith("text/csv")
+    lines = body.decode().splitlines()
+    assert lines[0] == "Variable,Date,Value"
+    assert len(lines) == 1 + 3 * 30
+
+    response, body = get(server, "/babies/laura/intake.csv", AUTH)
+    assert body.decode().splitlines()[0] == "Substance,Value,Unit,Interval"
+
+
+def test_last_updated_is_recorded_for_loaded_babies(server):
+    get(server, "/babies", AUTH)
+    get(server, "/babies/laura/intake.json", AUTH)
+
+    _, body = get(server, "/babies", AUTH)
+    last_updated = {baby["id"]: baby["last_updated"] for baby in json.loads(body)}
+    assert last_updated["laura"] == "2024-01-30"
+    assert last_updated["sara"] is None
+
+
+def test_if_none_match_returns_not_modified(server):
+    response, _ = get(server, "/babies/laura/metrics.json", AUTH)
+    etag = response.getheader("ETag")
+    assert etag.startswith('W/"')
+
+    for tag in [etag, etag.removeprefix("W/"), f'"other", {etag}', "*"]:
+        response, body = get(
+            server, "/babies/laura/metrics.json", {**AUTH, "If-None-Match": tag}
+        )
+        assert response.status == 304
+        assert body == b""
+        assert response.getheader("ETag") == etag
+        assert response.getheader("Cache-Control").startswith("private")
+        assert response.getheader("Vary") == "Accept-Encoding"
+
+    response, _ = get(
+        server, "/babies/laura/metrics.json", {**AUTH, "If-None-Match": '"other"'}
+    )
+    assert response.status == 200
+
+
+def test_gzip_is_negotiated_above_the_size_threshold(server):
+    gzip_headers = {**AUTH, "Accept-Encoding": "gzip"}
+
+    response, plain = get(server, "/babies/laura/history.json", AUTH)
+    assert response.getheader("Content-Encoding") is None
+    assert len(plain) >= api.MIN_GZIP_SIZE
+
+    response, body = get(server, "/babies/laura/history.json", gzip_headers)
+    assert response.getheader("Content-Encoding") == "gzip"
+    assert gzip.decompress(body) == plain
+
+    response, body = get(server, "/babies", gzip_headers)
+    assert len(body) < api.MIN_GZIP_SIZE
+    assert response.getheader("Content-Encoding") is None
+
+
+def test_responses_are_rendered_again_only_when_the_baby_changes(
+    server, sheets, monkeypatch
+):
+    monkeypatch.setattr(api, "babies_cache", TimedCache(0))
+    path = "/babies/laura/metrics.json"
+
+    first = api.build_response(path)
+    assert api.build_response(path) is first
+    assert sheets["fetches"] == 2
+
+    sheets["data"] = make_data(31)
+    changed = api.build_response(path)
+    assert changed[1] != first[1]
+    assert json.loads(changed[2])["metrics"][0]["Current"] == 2900.0
+    assert api.babies["laura"].version == 1
+
+
+def test_timed_cache_computes_once_for_concurrent_requests():
+    cache = TimedCache(ttl=60)
+    calls = []
+
+    def compute() -> int:
+        calls.append(1)
+        time.sleep(0.1)
+        return 42
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get("key", compute)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [42] * 8
+
+
+def test_timed_cache_recomputes_expired_entries():
+    cache = TimedCache(ttl=0)
+    assert cache.get("key", lambda: 1) == 1
+    assert cache.get("key", lambda: 2) == 2
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import pytest
+from baby import Baby, Variable
+
+
+def make_variable(dates: list[str], values: list[float]) -> Variable:
+    dataframe = pd.DataFrame({"Date": pd.to_datetime(dates), "Weight": values})
+    return Variable("Weight", "g", dataframe)
+
+
+def test_growth_velocity_matches_polyfit_on_irregular_samples():
+    dates = ["2024-01-01", "2024-01-02", "2024-01-04", "2024-01-05", "2024-01-09"]
+    dates += ["2024-01-10", "2024-01-13", "2024-01-14", "2024-01-20"]
+    values = [2000, 2031, 2080, 2118, 2190, 2230, 2301, 2322, 2450]
+    variable = make_variable(dates, values)
+
+    velocity = variable.compute_growth_velocity(window_days=7)
+
+    days = (pd.to_datetime(dates) - pd.Timestamp(dates[0])).days.to_numpy()
+    for i in range(len(days)):
+        in_window = (days >= days[i] - 7) & (days <= days[i])
+        if in_window.sum() < 2:
+            assert np.isnan(velocity["Daily Velocity"].iloc[i])
+            continue
+        expected = np.polyfit(days[in_window], np.array(values)[in_window], 1)[0]
+        assert np.isclose(velocity["Daily Velocity"].iloc[i], expected)
+        assert np.isclose(velocity["Weekly Velocity"].iloc[i], expected * 7)
+        assert velocity["Samples"].iloc[i] == in_window.sum()
+
+
+def test_growth_velocity_is_not_confident_after_a_long_pause():
+    dates = [f"2024-01-0{day}" for day in range(1, 8)]
+    dates += ["2024-02-20", "2024-02-21", "2024-02-22", "2024-02-23"]
+    variable = make_variable(dates, [2000 + 30 * i for i in range(len(dates))])
+
+    confident = variable.compute_growth_velocity()["Confident"].tolist()
+
+    assert confident == [False, False] + [True] * 5 + [False] * 4
+
+
+def test_refresh_extends_history_with_appended_rows():
+    variable = make_variable(["2024-01-01", "2024-01-08"], [2000, 2210])
+
+    dataframe = pd.DataFrame(
+        {
+            "Date": pd.to_datetime(["2024-01-01", "2024-01-08", "2024-01-09"]),
+            "Weight": [2000, 2210, 2240],
+        }
+    )
+
+    assert variable.refresh(dataframe)
+    assert variable.history["Value"].tolist() == [2000, 2210, 2240]
+    assert variable.current == 2240
+    assert variable.daily_increment == 30.0
+    assert not variable.refresh(dataframe)
+
+
+def test_refresh_matches_rebuild_with_same_day_samples():
+    dates = ["2024-01-01", "2024-01-03", "2024-01-03"]
+    dataframe = pd.DataFrame({"Date": pd.to_datetime(dates), "Weight": [1, 2, 3]})
+    variable = make_variable(dates[:2], [1, 2])
+
+    variable.refresh(dataframe)
+
+    rebuilt = Variable("Weight", "g", dataframe)
+    assert variable.history["Value"].tolist() == rebuilt.history["Value"].tolist()
+    assert variable.current == rebuilt.current == 3
+
+
+def test_failed_refresh_is_retried():
+    variable = make_variable(["2024-01-01"], [5.0])
+    blank = pd.DataFrame({"Date": pd.to_datetime(["2024-01-01"]), "Weight": [None]})
+
+    for _ in range(2):
+        with pytest.raises(IndexError):
+            variable.refresh(blank)
+        assert variable.current == 5.0
+        assert variable.history["Value"].tolist() == [5.0]
+
+
+def test_derived_values_are_recomputed_only_when_the_baby_changes():
+    data = pd.DataFrame(
+        {
+            "Date": pd.to_datetime(["2024-01-01", "2024-01-08"]),
+            "Weight": [2000.0, 2210.0],
+            "Length": [45.0, 45.5],
+            "Cephalic Circumference": [32.0, 32.2],
+            "Event": [None, None],
+        }
+    )
+    meds = pd.DataFrame({"Med": ["Hierro"], "Concentration": [25], "Unit": ["mg"]})
+    baby = Baby("Laura", data, meds)
+    calls = []
+
+    def compute() -> float:
+        calls.append(1)
+        return baby.weight.current
+
+    assert baby.derived("weight", compute) == 2210.0
+    assert not baby.refresh(data.copy(), meds.copy())
+    assert baby.derived("weight", compute) == 2210.0
+    assert len(calls) == 1
+
+    appended = pd.concat([data, data.iloc[[-1]].assign(Weight=2240.0)])
+    assert baby.refresh(appended, meds)
+    assert baby.derived("weight", compute) == 2240.0
+    assert len(calls) == 2
@@ -0,0 +1,64 @@
+import json
+import os
+
+from data_loader import (
+    DESCRIPTOR_INDEX_FILE,
+    load_descriptor_index,
+    update_descriptor_index,
+)
+
+
+def write_descriptor(path, name: str) -> None:
+    descriptor = {"name": name, "data_spreadsheet": {"sheet": name}}
+    path.write_text(json.dumps(descriptor))
+
+
+def test_descriptor_index_is_written_and_reused(tmp_path):
+    write_descriptor(tmp_path / "laura.json", "Laura")
+    write_descriptor(tmp_path / "sara.json", "Sara")
+
+    index = load_descriptor_index(tmp_path)
+
+    assert [entry["name"] for entry in index] == ["Laura", "Sara"]
+    assert (tmp_path / DESCRIPTOR_INDEX_FILE).exists()
+    assert list(tmp_path.glob("*.tmp")) == []
+    assert load_descriptor_index(tmp_path) == index
+
+
+def test_corrupt_descriptor_index_is_rebuilt(tmp_path):
+    write_descriptor(tmp_path / "laura.json", "Laura")
+    (tmp_path / DESCRIPTOR_INDEX_FILE).write_text('{"descriptors": [{"fi')
+
+    index = load_descriptor_index(tmp_path)
+
+    assert [entry["name"] for entry in index] == ["Laura"]
+    assert load_descriptor_index(tmp_path) == index
+
+
+def test_modified_descriptor_keeps_last_updated(tmp_path):
+    descriptor_file = tmp_path / "laura.json"
+    write_descriptor(descriptor_file, "Laura")
+    index = load_descriptor_index(tmp_path)
+    update_descriptor_index(tmp_path, index, "laura.json", "2024-01-07")
+
+    write_descriptor(descriptor_file, "Laura B.")
+    modified = descriptor_file.stat().st_mtime + 10
+    os.utime(descriptor_file, (modified, modified))
+    index = load_descriptor_index(tmp_path)
+
+    assert index[0]["name"] == "Laura B."
+    assert index[0]["last_updated"] == "2024-01-07"
+
+
+def test_concurrent_index_updates_are_not_lost(tmp_path):
+    write_descriptor(tmp_path / "laura.json", "Laura")
+    write_descriptor(tmp_path / "sara.json", "Sara")
+    first_session = load_descriptor_index(tmp_path)
+    second_session = load_descriptor_index(tmp_path)
+
+    update_descriptor_index(tmp_path, first_session, "laura.json", "2024-01-07")
+    update_descriptor_index(tmp_path, second_session, "sara.json", "2024-01-09")
+
+    index = load_descriptor_index(tmp_path)
+    assert [entry["last_updated"] for entry in index] == ["2024-01-07", "2024-01-09"]
+    assert first_session[0]["last_updated"] == "2024-01-07"